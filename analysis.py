@@ -4,7 +4,93 @@ import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
 
-def show_key_metrics(df: pd.DataFrame):
+# Tramos de "AntiguedadMes" para la distribución de antigüedad
+ANTIGUEDAD_BINS = (0, 1, 3, 5, 10, 20, 50)
+ANTIGUEDAD_LABELS = ("0-1", "1-3", "3-5", "5-10", "10-20", "20+")
+
+COLUMNAS_AUSENCIAS = (
+    "DiasTrabajados",
+    "DiasFalta",
+    "DiasLicenciaNormales",
+    "DiasLicenciaMaternales",
+    "DiasVacaciones"
+)
+
+# Causales de término que indican que el empleado está inactivo
+CAUSALES_INACTIVOS = frozenset([
+    "Abandonar el trabajo en forma injustificada",
+    "Conclusión del trabajo o servicio que dio origen al contrato",
+    "Falta de probidad del trabajador en el desempeño de sus funciones",
+    "Incumplimiento grave de las obligaciones que impone el contrato",
+    "Muerte del trabajador",
+    "Mutuo acuerdo entre las partes",
+    "Necesidades de la empresa establecimiento o servicio",
+    "No concurrencia del trabajador a sus labores sin causa dos días seguidos",
+    "Renuncia del Trabajador",
+    "Vencimiento del plazo convenido en el contrato",
+    "Vías de hecho ejercidas por el trabajador en contra del empleador"
+])
+
+def _contar_ruts_unicos(df: pd.DataFrame, claves: list, nombre: str, sort: bool = True) -> pd.DataFrame:
+    """
+    Cuenta los Rut únicos por grupo. Equivale a groupby(claves)["Rut"].nunique(), pero
+    deduplica primero los pares (claves, Rut) y luego solo cuenta filas por grupo.
+    Con sort=False se omite el ordenamiento de las claves, para cuando el resultado
+    se reordena o combina después.
+    """
+    pares = df.loc[df["Rut"].notna(), [*claves, "Rut"]].drop_duplicates()
+    return pares.groupby(claves, observed=True, sort=sort).size().reset_index(name=nombre)
+
+# Como en los _resumen_*, la caché usa la clave exacta del archivo y no el hash
+# muestreado que Streamlit calcula para DataFrames grandes
+@st.cache_data(show_spinner=False)
+def _calcular_metricas(_df: pd.DataFrame, clave_archivo: str) -> dict:
+    """Valores de las métricas clave; None cuando falta la columna necesaria."""
+    # "nombre_norm" y "contrato_norm" se calculan al cargar el archivo (utils.normalize_text_columns)
+    if "nombre_norm" in _df.columns:
+        # Códigos enteros por empleado (nombre normalizado); -1 corresponde a nombres nulos.
+        # La misma factorización da el total y alimenta la clasificación.
+        codigos, nombres = pd.factorize(_df["nombre_norm"])
+        total_empleados = len(nombres)
+    else:
+        total_empleados = len(_df)
+    
+    # Clasificación de empleados usando "nombre_norm" y "Clasificación Contrato";
+    # sin alguna de las dos columnas no hay nada que clasificar
+    empleados_planta = 0
+    empleados_temp = 0
+    if "contrato_norm" in _df.columns and "nombre_norm" in _df.columns:
+        validos = codigos >= 0
+        codigos = codigos[validos]
+        es_planta = _df["contrato_norm"].eq("planta").to_numpy()[validos]
+        es_temporal = _df["contrato_norm"].isin(["temporada", "part time"]).to_numpy()[validos]
+        # bincount suma las marcas de cada empleado en una sola pasada (equivale a groupby().any())
+        planta = np.bincount(codigos, weights=es_planta, minlength=len(nombres)) > 0
+        temporal = np.bincount(codigos, weights=es_temporal, minlength=len(nombres)) > 0
+        # Si aparece "planta" en cualquiera de los registros, se clasifica como planta.
+        empleados_planta = int(planta.sum())
+        # Si no es planta, pero aparece "temporada" o "part time", se clasifica como temporal.
+        empleados_temp = int((temporal & ~planta).sum())
+    
+    # Salario Prom. como la suma de 'SueldoBrutoContractual' dividida por total_empleados
+    salario_prom = None
+    if "SueldoBrutoContractual" in _df.columns and pd.api.types.is_numeric_dtype(_df["SueldoBrutoContractual"]):
+        if total_empleados > 0:
+            sueldos = _df["SueldoBrutoContractual"].to_numpy(dtype=np.float64, na_value=np.nan)
+            salario_prom = np.nansum(sueldos) / total_empleados
+    
+    # Gerencias únicas (columna "Gerencia")
+    gerencias = _df["Gerencia"].nunique() if "Gerencia" in _df.columns else None
+    
+    return {
+        "total_empleados": total_empleados,
+        "empleados_planta": empleados_planta,
+        "empleados_temp": empleados_temp,
+        "salario_prom": salario_prom,
+        "gerencias": gerencias
+    }
+
+def show_key_metrics(df: pd.DataFrame, clave_archivo: str):
     """
     Muestra las métricas clave de Recursos Humanos en la interfaz de Streamlit.
     
@@ -16,78 +102,47 @@ def show_key_metrics(df: pd.DataFrame):
     - Gerencias: Cantidad de gerencias únicas (columna "Gerencia").
     """
     st.markdown("## 📊 Métricas Clave")
-    
-    # Normalizamos la columna "Nombre Completo" para un conteo consistente
-    if "Nombre Completo" in df.columns:
-        df["nombre_norm"] = df["Nombre Completo"].astype(str).str.strip()
-        total_empleados = df["nombre_norm"].dropna().nunique()
-    else:
-        total_empleados = len(df)
-    
-    # Clasificación de empleados usando "nombre_norm" y "Clasificación Contrato"
-    empleados_planta = 0
-    empleados_temp = 0
-    if "Clasificación Contrato" in df.columns and "nombre_norm" in df.columns:
-        df["contrato_norm"] = df["Clasificación Contrato"].astype(str).str.lower().str.strip()
-        # Agrupamos por empleado (nombre normalizado) y obtenemos sus clasificaciones únicas
-        clasificaciones = df.groupby("nombre_norm")["contrato_norm"].agg(lambda x: list(x.unique()))
-        
-        def obtener_clasificacion_final(lista):
-            # Si aparece "planta" en cualquiera de los registros, se clasifica como planta.
-            if "planta" in lista:
-                return "planta"
-            # Si no es planta, pero aparece "temporada" o "part time", se clasifica como temporal.
-            elif any(val in ["temporada", "part time"] for val in lista):
-                return "temporal"
-            else:
-                return "desconocido"
-        
-        clasificacion_final = clasificaciones.apply(obtener_clasificacion_final)
-        empleados_planta = (clasificacion_final == "planta").sum()
-        empleados_temp = (clasificacion_final == "temporal").sum()
+    metricas = _calcular_metricas(df, clave_archivo)
     
     # Mostrar las métricas de empleados en tres columnas
     c1, c2, c3 = st.columns(3)
     with c1:
-        st.metric(label="Total Empleados", value=total_empleados)
+        st.metric(label="Total Empleados", value=metricas["total_empleados"])
     with c2:
-        st.metric(label="Empleados de Planta", value=empleados_planta)
+        st.metric(label="Empleados de Planta", value=metricas["empleados_planta"])
     with c3:
-        st.metric(label="Empleados Temp/Part-Time", value=empleados_temp)
+        st.metric(label="Empleados Temp/Part-Time", value=metricas["empleados_temp"])
     
     # Segunda fila: Salario Promedio y Gerencias
     c4, c5 = st.columns(2)
     with c4:
-        # Calcular Salario Prom. como la suma de 'SueldoBrutoContractual' dividida por total_empleados
-        if "SueldoBrutoContractual" in df.columns and pd.api.types.is_numeric_dtype(df["SueldoBrutoContractual"]):
-            if total_empleados > 0:
-                total_sueldo = df["SueldoBrutoContractual"].sum()
-                salario_prom = total_sueldo / total_empleados
-                st.metric(label="Salario Prom.", value=f"${salario_prom:,.2f}")
-            else:
-                st.metric(label="Salario Prom.", value="N/A")
+        if metricas["salario_prom"] is not None:
+            st.metric(label="Salario Prom.", value=f"${metricas['salario_prom']:,.2f}")
         else:
             st.metric(label="Salario Prom.", value="N/A")
     with c5:
-        # Ahora se cuentan las gerencias únicas (columna "Gerencia")
-        if "Gerencia" in df.columns:
-            gerencias = df["Gerencia"].nunique()
-            st.metric(label="Gerencias", value=gerencias)
+        if metricas["gerencias"] is not None:
+            st.metric(label="Gerencias", value=metricas["gerencias"])
         else:
             st.metric(label="Gerencias", value="N/A")
-def horas_extras_vs_sueldos(df: pd.DataFrame):
+
+# Los _resumen_* reciben el DataFrame como _df para que Streamlit no lo hashee y se
+# cachean por clave_archivo (hash del archivo subido): con DataFrames grandes el hash
+# de Streamlit usa solo una muestra de filas y podía devolver agregados de otro archivo.
+@st.cache_data(show_spinner=False)
+def _resumen_horas_extras(_df: pd.DataFrame, clave_archivo: str, required_cols: list) -> pd.DataFrame:
+    """Suma por período de horas extras y sueldo por días trabajados."""
+    # Solo se agrupan las columnas necesarias, no el DataFrame completo
+    return _df.loc[:, required_cols].groupby("Periodo", observed=True).sum().reset_index()
+
+def horas_extras_vs_sueldos(df: pd.DataFrame, clave_archivo: str):
     st.header("Análisis: Horas Extras vs. Sueldos")
     required_cols = ["Periodo", "HrsExt_Normales", "HrsExt_Dobles", "HrsExt_215", "SueldoBrutoDiasTrab"]
     if not all(col in df.columns for col in required_cols):
         st.warning(f"Faltan columnas: {set(required_cols) - set(df.columns)}")
         return
 
-    group_data = df.groupby("Periodo").agg({
-        "HrsExt_Normales": "sum",
-        "HrsExt_Dobles": "sum",
-        "HrsExt_215": "sum",
-        "SueldoBrutoDiasTrab": "sum"
-    }).reset_index()
+    group_data = _resumen_horas_extras(df, clave_archivo, required_cols)
 
     st.write("Resumen por Período")
     st.dataframe(group_data)
@@ -99,7 +154,7 @@ def horas_extras_vs_sueldos(df: pd.DataFrame):
         title="Horas Extras Normales por Período",
         labels={"HrsExt_Normales": "Horas Extras Normales"}
     )
-    st.plotly_chart(fig_bar, use_container_width=True)
+    st.plotly_chart(fig_bar, use_container_width=True, key="horas_extras_barras")
 
     fig_line = px.line(
         group_data,
@@ -108,27 +163,36 @@ def horas_extras_vs_sueldos(df: pd.DataFrame):
         title="Sueldo Bruto (Días Trabajados) por Período",
         labels={"SueldoBrutoDiasTrab": "Sueldo Bruto"}
     )
-    st.plotly_chart(fig_line, use_container_width=True)
+    st.plotly_chart(fig_line, use_container_width=True, key="horas_extras_lineas")
+
+@st.cache_data(show_spinner=False)
+def _resumen_faltas_sueldo(_df: pd.DataFrame, clave_archivo: str, required_cols: list) -> pd.DataFrame:
+    """Suma por período de faltas y sueldos, con el descuento total y por día de falta."""
+    group_data = _df.loc[:, required_cols].groupby("Periodo", observed=True).sum().reset_index()
+
+    descuento = (
+        group_data["SueldoBrutoContractual"].to_numpy(dtype=np.float64)
+        - group_data["SueldoBrutoDiasTrab"].to_numpy(dtype=np.float64)
+    )
+    dias_falta = group_data["DiasFalta"].to_numpy(dtype=np.float64)
+    group_data["DescuentoTotal"] = descuento
+    # Solo se divide donde hay faltas; el resto queda en 0 sin evaluar la división
+    group_data["DescuentoPromedioPorDiaFalta"] = np.divide(
+        descuento,
+        dias_falta,
+        out=np.zeros_like(descuento),
+        where=dias_falta > 0
+    )
+    return group_data
 
-def faltas_vs_sueldo(df: pd.DataFrame):
+def faltas_vs_sueldo(df: pd.DataFrame, clave_archivo: str):
     st.header("Análisis: Faltas vs. Sueldo")
     required_cols = ["Periodo", "DiasFalta", "SueldoBrutoContractual", "SueldoBrutoDiasTrab"]
     if not all(col in df.columns for col in required_cols):
         st.warning(f"Faltan columnas: {set(required_cols) - set(df.columns)}")
         return
 
-    group_data = df.groupby("Periodo").agg({
-        "DiasFalta": "sum",
-        "SueldoBrutoContractual": "sum",
-        "SueldoBrutoDiasTrab": "sum"
-    }).reset_index()
-
-    group_data["DescuentoTotal"] = group_data["SueldoBrutoContractual"] - group_data["SueldoBrutoDiasTrab"]
-    group_data["DescuentoPromedioPorDiaFalta"] = np.where(
-        group_data["DiasFalta"] > 0,
-        group_data["DescuentoTotal"] / group_data["DiasFalta"],
-        0
-    )
+    group_data = _resumen_faltas_sueldo(df, clave_archivo, required_cols)
 
     st.write("Resumen por Período")
     st.dataframe(group_data)
@@ -151,9 +215,25 @@ def faltas_vs_sueldo(df: pd.DataFrame):
         xaxis_title="Período",
         yaxis_title="Sueldo"
     )
-    st.plotly_chart(fig, use_container_width=True)
-
-def antiguedad(df: pd.DataFrame):
+    st.plotly_chart(fig, use_container_width=True, key="faltas_vs_sueldo")
+
+@st.cache_data(show_spinner=False)
+def _resumen_antiguedad(_df: pd.DataFrame, clave_archivo: str) -> pd.DataFrame:
+    """Cantidad de Rut únicos en cada tramo de antigüedad."""
+    # Índice del tramo de cada registro (intervalos [a, b)); fuera de rango queda en -1 o len(labels)
+    antiguedad_arr = _df["AntiguedadMes"].to_numpy(dtype=np.float64, na_value=np.nan)
+    tramos = np.digitize(antiguedad_arr, ANTIGUEDAD_BINS) - 1
+    ruts, _ = pd.factorize(_df["Rut"])
+    validos = (tramos >= 0) & (tramos < len(ANTIGUEDAD_LABELS)) & (ruts >= 0)
+
+    # Pares (tramo, Rut) únicos y conteo por tramo, sin crear la columna categórica
+    pares = np.unique(np.stack([tramos[validos], ruts[validos]]), axis=1)
+    return pd.DataFrame({
+        "RangoAntiguedad": ANTIGUEDAD_LABELS,
+        "NumEmpleados": np.bincount(pares[0], minlength=len(ANTIGUEDAD_LABELS))
+    })
+
+def antiguedad(df: pd.DataFrame, clave_archivo: str):
     st.header("Análisis: Antigüedad de Empleados")
     if "AntiguedadMes" not in df.columns:
         st.warning("No se encontró la columna 'AntiguedadMes'.")
@@ -162,10 +242,7 @@ def antiguedad(df: pd.DataFrame):
         st.warning("No se encontró la columna 'Rut'.")
         return
 
-    bins = [0, 1, 3, 5, 10, 20, 50]
-    labels = ["0-1", "1-3", "3-5", "5-10", "10-20", "20+"]
-    df["RangoAntiguedad"] = pd.cut(df["AntiguedadMes"], bins=bins, labels=labels, right=False)
-    count_antiguedad = df.groupby("RangoAntiguedad")["Rut"].nunique().reset_index(name="NumEmpleados")
+    count_antiguedad = _resumen_antiguedad(df, clave_archivo)
 
     st.write("Distribución de empleados por rango de antigüedad")
     st.dataframe(count_antiguedad)
@@ -176,9 +253,16 @@ def antiguedad(df: pd.DataFrame):
         values="NumEmpleados",
         title="Distribución de Antigüedad"
     )
-    st.plotly_chart(fig_pie, use_container_width=True)
+    st.plotly_chart(fig_pie, use_container_width=True, key="antiguedad")
 
-def dotacion(df: pd.DataFrame):
+@st.cache_data(show_spinner=False)
+def _resumen_dotacion(_df: pd.DataFrame, clave_archivo: str) -> tuple:
+    """Dotación total y Rut únicos por Período y Gerencia."""
+    dotacion_total = _df["Rut"].nunique()
+    dotacion_por_periodo_depto = _contar_ruts_unicos(_df, ["Periodo", "Gerencia"], "NumEmpleados")
+    return dotacion_total, dotacion_por_periodo_depto
+
+def dotacion(df: pd.DataFrame, clave_archivo: str):
     st.header("Análisis: Dotación")
     needed_cols = ["Rut", "Periodo", "Gerencia"]
     missing = [col for col in needed_cols if col not in df.columns]
@@ -186,15 +270,9 @@ def dotacion(df: pd.DataFrame):
         st.warning(f"Faltan columnas para este análisis de dotación: {missing}")
         return
 
-    dotacion_total = df["Rut"].nunique()
+    dotacion_total, dotacion_por_periodo_depto = _resumen_dotacion(df, clave_archivo)
     st.write(f"**Dotación total:** {dotacion_total} empleados únicos.")
 
-    dotacion_por_periodo_depto = (
-        df.groupby(["Periodo", "Gerencia"])["Rut"]
-        .nunique()
-        .reset_index(name="NumEmpleados")
-    )
-
     st.subheader("Distribución de empleados por Período y Departamento")
     st.dataframe(dotacion_por_periodo_depto)
 
@@ -207,43 +285,52 @@ def dotacion(df: pd.DataFrame):
         title="Cantidad de Empleados por Año-Mes y Departamento",
         labels={"NumEmpleados": "Número de Empleados"}
     )
-    st.plotly_chart(fig_bar, use_container_width=True)
+    st.plotly_chart(fig_bar, use_container_width=True, key="dotacion")
+
+@st.cache_data(show_spinner=False)
+def _resumen_ausencias(_df: pd.DataFrame, clave_archivo: str, ausencias_cols: list) -> pd.DataFrame:
+    """Suma por período de cada tipo de ausencia."""
+    return (
+        _df.loc[:, ["Periodo", *ausencias_cols]]
+        .groupby("Periodo", observed=True)
+        .sum()
+        .reset_index()
+    )
 
-def composicion_ausencias(df: pd.DataFrame):
+def composicion_ausencias(df: pd.DataFrame, clave_archivo: str):
     st.header("Análisis: Composición de Ausencias")
-    ausencias_cols = [
-        "DiasTrabajados",
-        "DiasFalta",
-        "DiasLicenciaNormales",
-        "DiasLicenciaMaternales",
-        "DiasVacaciones"
-    ]
-    ausencias_cols = [col for col in ausencias_cols if col in df.columns]
+    ausencias_cols = [col for col in COLUMNAS_AUSENCIAS if col in df.columns]
 
     if len(ausencias_cols) > 1 and "Periodo" in df.columns:
-        comp_ausencias = df.groupby("Periodo")[ausencias_cols].sum().reset_index()
+        comp_ausencias = _resumen_ausencias(df, clave_archivo, ausencias_cols)
         st.write("Resumen de Ausencias por Período")
         st.dataframe(comp_ausencias)
 
-        fig_area = go.Figure()
-        for col in ausencias_cols:
-            fig_area.add_trace(go.Scatter(
-                x=comp_ausencias["Periodo"],
-                y=comp_ausencias[col],
-                mode="lines",
-                stackgroup="one",
-                name=col
-            ))
-        fig_area.update_layout(
+        # Formato largo: un solo px.area construye todas las series apiladas de una vez
+        comp_largo = comp_ausencias.melt(
+            id_vars="Periodo", value_vars=ausencias_cols, var_name="Tipo", value_name="Dias"
+        )
+        fig_area = px.area(
+            comp_largo,
+            x="Periodo",
+            y="Dias",
+            color="Tipo",
             title="Composición de Ausencias",
-            xaxis_title="Período",
-            yaxis_title="Días"
+            labels={"Periodo": "Período", "Dias": "Días"}
         )
-        st.plotly_chart(fig_area, use_container_width=True)
+        st.plotly_chart(fig_area, use_container_width=True, key="composicion_ausencias")
     else:
         st.warning("No se encontraron las columnas de ausencias requeridas o la columna 'Periodo'.")
 
-def empleados_activos(df: pd.DataFrame):
+@st.cache_data(show_spinner=False)
+def _resumen_empleados_activos(_df: pd.DataFrame, clave_archivo: str) -> pd.DataFrame:
+    """Rut únicos sin fecha de término de contrato, por período."""
+    # '_activo' se precalcula en la carga; si no viene, se deriva de la fecha de término
+    activo = _df["_activo"] if "_activo" in _df.columns else _df["FechaTerminoContrato"].isna()
+    df_activos = _df.loc[activo, ["Periodo", "Rut"]]
+    return _contar_ruts_unicos(df_activos, ["Periodo"], "NumEmpleadosActivos")
+
+def empleados_activos(df: pd.DataFrame, clave_archivo: str):
     st.header("Análisis: Empleados Activos (Corte)")
     if "FechaTerminoContrato" not in df.columns:
         st.warning("La columna 'FechaTerminoContrato' no está presente en el DataFrame.")
@@ -252,12 +339,7 @@ def empleados_activos(df: pd.DataFrame):
         st.warning("Falta la columna 'Rut' o 'Periodo' para este análisis.")
         return
 
-    df_activos = df[df["FechaTerminoContrato"].isna()]
-    activos_por_periodo = (
-        df_activos.groupby("Periodo")["Rut"]
-        .nunique()
-        .reset_index(name="NumEmpleadosActivos")
-    )
+    activos_por_periodo = _resumen_empleados_activos(df, clave_archivo)
 
     st.write("Empleados activos por Período")
     st.dataframe(activos_por_periodo)
@@ -269,19 +351,14 @@ def empleados_activos(df: pd.DataFrame):
         title="Empleados Activos a lo largo del tiempo",
         labels={"NumEmpleadosActivos": "Número de Empleados Activos"}
     )
-    st.plotly_chart(fig_line_activos, use_container_width=True)
-
-def faltas_por_cargo_y_departamento(df: pd.DataFrame):
-    st.header("Porcentaje de Faltas por Cargo y Departamento (Tablas)")
-    needed_cols = ["Cargo", "Gerencia", "DiasFalta"]
-    missing_cols = [col for col in needed_cols if col not in df.columns]
-    if missing_cols:
-        st.warning(f"Faltan columnas para este análisis: {missing_cols}")
-        return
+    st.plotly_chart(fig_line_activos, use_container_width=True, key="empleados_activos")
 
+@st.cache_data(show_spinner=False)
+def _resumen_faltas_por_cargo(_df: pd.DataFrame, clave_archivo: str) -> pd.DataFrame:
+    """Días de falta por Cargo y Gerencia con su porcentaje dentro de la Gerencia."""
     # Agrupar por Cargo y Gerencia sumando los días de falta
     df_grouped = (
-        df.groupby(["Cargo", "Gerencia"])["DiasFalta"]
+        _df.groupby(["Cargo", "Gerencia"], observed=True, sort=False)["DiasFalta"]
         .sum()
         .reset_index()
     )
@@ -290,28 +367,47 @@ def faltas_por_cargo_y_departamento(df: pd.DataFrame):
     df_grouped = df_grouped[df_grouped["DiasFalta"] > 0]
 
     # Calcular el total de faltas por departamento y el porcentaje por cargo
-    df_grouped["TotalDepto"] = df_grouped.groupby("Gerencia")["DiasFalta"].transform("sum")
+    df_grouped["TotalDepto"] = df_grouped.groupby("Gerencia", observed=True, sort=False)["DiasFalta"].transform("sum")
     df_grouped["Porcentaje"] = (df_grouped["DiasFalta"] / df_grouped["TotalDepto"]) * 100
 
-    # Iterar por cada Gerencia y mostrar la tabla correspondiente
-    for depto in sorted(df_grouped["Gerencia"].unique()):
+    # Ordenar una sola vez; cada Gerencia conserva este orden al particionar
+    return df_grouped.sort_values("Porcentaje", ascending=False)
+
+def faltas_por_cargo_y_departamento(df: pd.DataFrame, clave_archivo: str):
+    st.header("Porcentaje de Faltas por Cargo y Departamento (Tablas)")
+    needed_cols = ["Cargo", "Gerencia", "DiasFalta"]
+    missing_cols = [col for col in needed_cols if col not in df.columns]
+    if missing_cols:
+        st.warning(f"Faltan columnas para este análisis: {missing_cols}")
+        return
+
+    df_grouped = _resumen_faltas_por_cargo(df, clave_archivo)
+
+    # Recorrer cada Gerencia particionando con groupby
+    for depto, df_depto in df_grouped.groupby("Gerencia", observed=True, sort=True):
         st.subheader(f"Gerencia: {depto}")
-        df_depto = df_grouped[df_grouped["Gerencia"] == depto].copy()
-        df_depto = df_depto.sort_values("Porcentaje", ascending=False)
         st.table(df_depto[["Cargo", "DiasFalta", "Porcentaje"]].reset_index(drop=True))
 
-def grafico_causales_termino(df: pd.DataFrame):
+@st.cache_data(show_spinner=False)
+def _resumen_causales_termino(_df: pd.DataFrame, clave_archivo: str) -> pd.DataFrame:
+    """Rut únicos por Periodo y Causal de Término, excluyendo "Sin definir"."""
+    # Filtrar registros para excluir "Sin definir"
+    df_filtrado = _df.loc[
+        _df["Causal de Término"] != "Sin definir",
+        ["Periodo", "Causal de Término", "Rut"]
+    ]
+
+    # Agrupar por Periodo y Causal, contando empleados únicos (usando "Rut")
+    df_agg = _contar_ruts_unicos(df_filtrado, ["Periodo", "Causal de Término"], "Cantidad")
+    return df_agg.sort_values("Periodo")
+
+def grafico_causales_termino(df: pd.DataFrame, clave_archivo: str):
     st.header("Causales de Término de Contrato por Periodo")
     if "Causal de Término" not in df.columns or "Periodo" not in df.columns:
         st.warning("No se encuentra la columna 'Causal de Término' o 'Periodo' en el DataFrame.")
         return
 
-    # Filtrar registros para excluir "Sin definir"
-    df_filtrado = df[df["Causal de Término"].astype(str).str.strip() != "Sin definir"]
-
-    # Agrupar por Periodo y Causal, contando empleados únicos (usando "Rut")
-    df_agg = df_filtrado.groupby(["Periodo", "Causal de Término"])["Rut"].nunique().reset_index(name="Cantidad")
-    df_agg = df_agg.sort_values("Periodo")
+    df_agg = _resumen_causales_termino(df, clave_archivo)
 
     st.dataframe(df_agg)
 
@@ -325,50 +421,49 @@ def grafico_causales_termino(df: pd.DataFrame):
         title="Causales de Término de Contrato por Periodo (sin 'Sin definir')",
         labels={"Cantidad": "Número de Empleados", "Periodo": "Periodo"}
     )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, use_container_width=True, key="causales_termino")
+
+@st.cache_data(show_spinner=False)
+def _resumen_activos_inactivos(_df: pd.DataFrame, clave_archivo: str) -> tuple:
+    """Totales, primeras filas y conteo por período de empleados activos e inactivos."""
+    # Filtrar empleados activos e inactivos
+    df_activos = _df[_df["Causal de Término"] == "Sin definir"]
+    df_inactivos = _df[_df["Causal de Término"].isin(CAUSALES_INACTIVOS)]
+
+    # Agrupar por Periodo y contar empleados (únicos según Rut)
+    activos_por_periodo = _contar_ruts_unicos(df_activos, ["Periodo"], "Activos", sort=False)
+    inactivos_por_periodo = _contar_ruts_unicos(df_inactivos, ["Periodo"], "Inactivos", sort=False)
+
+    # Combinar ambos DataFrames para tener la comparación
+    df_comparacion = activos_por_periodo.merge(inactivos_por_periodo, on="Periodo", how="outer").fillna(0)
+    df_comparacion = df_comparacion.sort_values("Periodo")
+
+    # Solo se guardan las primeras filas de cada grupo, que es lo que se muestra
+    return (
+        df_activos.shape[0],
+        df_activos.head(10),
+        df_inactivos.shape[0],
+        df_inactivos.head(10),
+        df_comparacion
+    )
 
-def filtrar_empleados_activos_inactivos(df: pd.DataFrame):
+def filtrar_empleados_activos_inactivos(df: pd.DataFrame, clave_archivo: str):
     st.header("Empleados Activos vs Inactivos")
     # Verificar que la columna exista
     if "Causal de Término" not in df.columns:
         st.warning("La columna 'Causal de Término' no se encuentra en el DataFrame.")
         return
-    # Lista de causales que indican inactividad
-    causales_inactivos = [
-        "Abandonar el trabajo en forma injustificada",
-        "Conclusión del trabajo o servicio que dio origen al contrato",
-        "Falta de probidad del trabajador en el desempeño de sus funciones",
-        "Incumplimiento grave de las obligaciones que impone el contrato",
-        "Muerte del trabajador",
-        "Mutuo acuerdo entre las partes",
-        "Necesidades de la empresa establecimiento o servicio",
-        "No concurrencia del trabajador a sus labores sin causa dos días seguidos",
-        "Renuncia del Trabajador",
-        "Vencimiento del plazo convenido en el contrato",
-        "Vías de hecho ejercidas por el trabajador en contra del empleador"
-    ]
-    # Asegurarse de que los valores no tengan espacios adicionales
-    df["Causal de Término"] = df["Causal de Término"].astype(str).str.strip()
-
-    # Filtrar empleados activos e inactivos
-    df_activos = df[df["Causal de Término"] == "Sin definir"]
-    df_inactivos = df[df["Causal de Término"].isin(causales_inactivos)]
+    total_activos, muestra_activos, total_inactivos, muestra_inactivos, df_comparacion = (
+        _resumen_activos_inactivos(df, clave_archivo)
+    )
     
     st.subheader("Empleados Activos")
-    st.write(f"Total activos: {df_activos.shape[0]}")
-    st.dataframe(df_activos.head(10))
+    st.write(f"Total activos: {total_activos}")
+    st.dataframe(muestra_activos)
     
     st.subheader("Empleados Inactivos")
-    st.write(f"Total inactivos: {df_inactivos.shape[0]}")
-    st.dataframe(df_inactivos.head(10))
-    
-    # Agrupar por Periodo y contar empleados (únicos según Rut)
-    activos_por_periodo = df_activos.groupby("Periodo")["Rut"].nunique().reset_index(name="Activos")
-    inactivos_por_periodo = df_inactivos.groupby("Periodo")["Rut"].nunique().reset_index(name="Inactivos")
-    
-    # Combinar ambos DataFrames para tener la comparación
-    df_comparacion = activos_por_periodo.merge(inactivos_por_periodo, on="Periodo", how="outer").fillna(0)
-    df_comparacion = df_comparacion.sort_values("Periodo")
+    st.write(f"Total inactivos: {total_inactivos}")
+    st.dataframe(muestra_inactivos)
     
     st.subheader("Comparación de Empleados Activos vs Inactivos en el Tiempo")
     fig_comparacion = px.line(
@@ -378,4 +473,4 @@ def filtrar_empleados_activos_inactivos(df: pd.DataFrame):
         title="Comparación de Empleados Activos vs Inactivos a lo largo del tiempo",
         labels={"value": "Número de Empleados", "Periodo": "Período"}
     )
-    st.plotly_chart(fig_comparacion, use_container_width=True)
+    st.plotly_chart(fig_comparacion, use_container_width=True, key="activos_vs_inactivos")
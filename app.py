@@ -1,11 +1,122 @@
+import hashlib
+import io
+
 import streamlit as st
 import pandas as pd
-import time
 
 import ui
 import analysis
 import utils
 
+# Diccionario para renombrar columnas (ajusta según tus datos)
+RENAME_MAP = {
+    "Período": "Periodo",
+    "Días de Falta": "DiasFalta",
+    "Sueldo Bruto Contractual": "SueldoBrutoContractual",
+    "Sueldo Bruto (días trabajados)": "SueldoBrutoDiasTrab",
+    "Cantidad de Horas Extras Normales": "HrsExt_Normales",
+    "Cantidad de Horas Extras al Doble": "HrsExt_Dobles",
+    "Cantidad de Horas Extras al 215%": "HrsExt_215",
+    "Antigüedad al corte de mes": "AntiguedadMes",
+    "Fecha de Término Contrato": "FechaTerminoContrato",
+    "Días Trabajados": "DiasTrabajados",
+    "Días de Licencia Normales": "DiasLicenciaNormales",
+    "Días de Licencia Maternales": "DiasLicenciaMaternales",
+    "Días de Vacaciones": "DiasVacaciones",
+    "Cargo": "Cargo",
+    "Gerencia": "Gerencia",
+    "Causal de Término": "Causal de Término"
+}
+
+# Columnas que usa el dashboard (nombres originales o ya renombrados); el resto no se carga
+COLUMNAS_USADAS = frozenset([
+    *RENAME_MAP,
+    *RENAME_MAP.values(),
+    "Rut",
+    "Nombre Completo",
+    "Clasificación Contrato"
+])
+
+def _columna_usada(col) -> bool:
+    return col in COLUMNAS_USADAS
+
+def _leer_excel(buffer: io.BytesIO, **kwargs) -> pd.DataFrame:
+    try:
+        # python-calamine lee xlsx mucho más rápido que openpyxl (pandas >= 2.2)
+        return pd.read_excel(buffer, sheet_name=0, engine="calamine", **kwargs)
+    except (ImportError, ValueError):
+        buffer.seek(0)
+        return pd.read_excel(buffer, sheet_name=0, **kwargs)
+
+# El spinner solo aparece cuando hay que leer el archivo (cache miss), no en cada rerun.
+# La caché vive solo en memoria: no se escriben a disco archivos con Rut, nombres y sueldos.
+# max_entries y ttl acotan esa memoria: quedan a lo sumo los dos archivos usados
+# más recientemente, y cada uno se descarta una hora después de cargarse.
+@st.cache_data(show_spinner="Procesando archivo...", max_entries=2, ttl=3600)
+def load_and_prepare(file_bytes: bytes, name: str) -> tuple[pd.DataFrame, list, str]:
+    """
+    Lee el archivo subido (CSV/Excel), renombra sus columnas y procesa 'Periodo'.
+    Solo se cargan las columnas de COLUMNAS_USADAS; junto al DataFrame se devuelve
+    el encabezado original completo, para que el usuario pueda revisar el renombrado,
+    y una clave exacta del archivo (hash de su contenido) con la que se cachean los análisis.
+    El resultado se cachea en memoria por el contenido del archivo, por lo que los
+    reruns de Streamlit (cada clic en el menú) no vuelven a leerlo.
+    """
+    clave_archivo = f"{name}:{hashlib.sha256(file_bytes).hexdigest()}"
+    buffer = io.BytesIO(file_bytes)
+    if name.endswith('.csv'):
+        # El motor pyarrow no acepta un usecols invocable: se lee primero el encabezado
+        # y se le pasa la lista de columnas usadas, para que no parsee las demás
+        columnas_archivo = pd.read_csv(buffer, nrows=0).columns.tolist()
+        usecols = [col for col in columnas_archivo if _columna_usada(col)]
+        buffer.seek(0)
+        try:
+            # Parser multihilo de pyarrow, si está instalado
+            df = pd.read_csv(buffer, engine="pyarrow", usecols=usecols)
+        except (ImportError, ValueError):
+            # ArrowInvalid hereda de ValueError: pyarrow rechaza CSV que el parser C sí
+            # lee (valores entre comillas con saltos de línea, filas con menos campos)
+            buffer.seek(0)
+            df = pd.read_csv(buffer, usecols=usecols)
+    else:
+        # El usecols invocable recibe cada encabezado (ya deduplicado por pandas), así
+        # que se registran ahí sin abrir el libro una segunda vez. Un dict evita repetirlos
+        # si _leer_excel reintenta con openpyxl.
+        encabezados = {}
+        def _registrar_columna(col) -> bool:
+            encabezados[col] = None
+            return _columna_usada(col)
+        df = _leer_excel(buffer, usecols=_registrar_columna)
+        columnas_archivo = list(encabezados)
+
+    df = df.rename(columns=RENAME_MAP)
+    # Procesa la columna "Periodo" para convertirla a datetime y extraer Año y Mes
+    df = utils.process_period_column(df)
+    df = utils.normalize_text_columns(df)
+    df = utils.add_active_flag(df)
+    df = utils.downcast_numeric_columns(df)
+    df = utils.categorize_key_columns(df)
+    return utils.categorize_low_cardinality_columns(df), columnas_archivo, clave_archivo
+
+def mostrar_datos_procesados(df: pd.DataFrame, clave_archivo: str):
+    st.subheader("Datos Procesados")
+    st.write("Resumen general de los datos cargados (solo las columnas que usa el dashboard, más las derivadas):")
+    st.write(f"Filas: {df.shape[0]}, Columnas: {df.shape[1]}")
+
+# Opción del menú -> función que muestra el análisis (el orden define el menú)
+ANALISIS = {
+    "📑 Datos Procesados": mostrar_datos_procesados,
+    "Horas Extras vs. Sueldos": analysis.horas_extras_vs_sueldos,
+    "Faltas vs. Sueldo": analysis.faltas_vs_sueldo,
+    "Antigüedad": analysis.antiguedad,
+    "Dotación": analysis.dotacion,
+    "Composición de Ausencias": analysis.composicion_ausencias,
+    "Empleados Activos (Corte)": analysis.empleados_activos,
+    "Empleados Activos vs Inactivos": analysis.filtrar_empleados_activos_inactivos,
+    "Faltas por Cargo y Departamento": analysis.faltas_por_cargo_y_departamento,
+    "Causales de Término": analysis.grafico_causales_termino
+}
+
 def main():
     # Configuración de la página
     st.set_page_config(
@@ -23,104 +134,32 @@ def main():
     st.sidebar.subheader("📂 Carga de Datos")
     uploaded_file = st.sidebar.file_uploader("Sube tu archivo (CSV/Excel)", type=["csv", "xlsx"])
     
-    analisis_opcion = st.sidebar.radio(
-        "Seleccione el análisis:",
-        [
-            "📑 Datos Procesados",
-            "Horas Extras vs. Sueldos",
-            "Faltas vs. Sueldo",
-            "Antigüedad",
-            "Dotación",
-            "Composición de Ausencias",
-            "Empleados Activos (Corte)",
-            "Empleados Activos vs Inactivos",
-            "Faltas por Cargo y Departamento",
-            "Causales de Término"
-        ]
-    )
+    analisis_opcion = st.sidebar.radio("Seleccione el análisis:", list(ANALISIS))
 
     if uploaded_file is not None:
-        # Barra de progreso simulada
-        progress_bar = st.progress(0)
-        with st.spinner("Procesando archivo..."):
-            for i in range(100):
-                time.sleep(0.01)
-                progress_bar.progress(i + 1)
-
-        # Lectura del archivo
+        # Lectura y preparación del archivo (cacheada por contenido)
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file, sheet_name=0)
+            df, columnas_archivo, clave_archivo = load_and_prepare(uploaded_file.getvalue(), uploaded_file.name)
         except Exception as e:
             st.error(f"Error al leer el archivo: {e}")
             st.stop()
 
         st.success("¡Archivo cargado y procesado con éxito!")
 
-        # Diccionario para renombrar columnas (ajusta según tus datos)
-        rename_map = {
-            "Período": "Periodo",
-            "Días de Falta": "DiasFalta",
-            "Sueldo Bruto Contractual": "SueldoBrutoContractual",
-            "Sueldo Bruto (días trabajados)": "SueldoBrutoDiasTrab",
-            "Cantidad de Horas Extras Normales": "HrsExt_Normales",
-            "Cantidad de Horas Extras al Doble": "HrsExt_Dobles",
-            "Cantidad de Horas Extras al 215%": "HrsExt_215",
-            "Antigüedad al corte de mes": "AntiguedadMes",
-            "Fecha de Término Contrato": "FechaTerminoContrato",
-            "Días Trabajados": "DiasTrabajados",
-            "Días de Licencia Normales": "DiasLicenciaNormales",
-            "Días de Licencia Maternales": "DiasLicenciaMaternales",
-            "Días de Vacaciones": "DiasVacaciones",
-            "Cargo": "Cargo",
-            "Gerencia": "Gerencia",
-            "Causal de Término": "Causal de Término"
-        }
-        df = df.rename(columns=rename_map)
-
-        analysis.show_key_metrics(df)
-        # Procesa la columna "Periodo" para convertirla a datetime y extraer Año y Mes
-        df = utils.process_period_column(df)
+        analysis.show_key_metrics(df, clave_archivo)
 
         # Mostrar vista previa y columnas para verificar el renombrado y el procesamiento
         with st.expander("Vista previa y columnas"):
             st.dataframe(df.head(10))
             st.write("Columnas actuales:", df.columns.tolist())
+            st.write("Columnas del archivo:", columnas_archivo)
+            # Encabezados mal escritos o sin tildes (p. ej. "Dias de Falta") no se reconocen
+            no_cargadas = [col for col in columnas_archivo if not _columna_usada(col)]
+            if no_cargadas:
+                st.write("Columnas no reconocidas (no se cargan):", no_cargadas)
 
         # Llama a la función de análisis según la opción seleccionada
-        if analisis_opcion == "📑 Datos Procesados":
-            st.subheader("Datos Procesados")
-            st.write("Resumen general de los datos:")
-            st.write(f"Filas: {df.shape[0]}, Columnas: {df.shape[1]}")
-
-        elif analisis_opcion == "Horas Extras vs. Sueldos":
-            analysis.horas_extras_vs_sueldos(df)
-
-        elif analisis_opcion == "Faltas vs. Sueldo":
-            analysis.faltas_vs_sueldo(df)
-
-        elif analisis_opcion == "Antigüedad":
-            analysis.antiguedad(df)
-
-        elif analisis_opcion == "Dotación":
-            analysis.dotacion(df)
-
-        elif analisis_opcion == "Composición de Ausencias":
-            analysis.composicion_ausencias(df)
-
-        elif analisis_opcion == "Empleados Activos (Corte)":
-            analysis.empleados_activos(df)
-
-        elif analisis_opcion == "Empleados Activos vs Inactivos":
-            analysis.filtrar_empleados_activos_inactivos(df)
-
-        elif analisis_opcion == "Faltas por Cargo y Departamento":
-            analysis.faltas_por_cargo_y_departamento(df)
-        
-        elif analisis_opcion == "Causales de Término":
-            analysis.grafico_causales_termino(df)
+        ANALISIS[analisis_opcion](df, clave_archivo)
     else:
         st.info("Por favor, sube un archivo para iniciar el análisis.")
 
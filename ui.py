@@ -1,8 +1,8 @@
 # ui.py
 import streamlit as st
 
-def set_dark_theme():
-    dark_css = """
+# Estilos del tema oscuro, definidos una sola vez al importar el módulo
+DARK_CSS = """
     <style>
     /* Fondo general en modo oscuro */
     body, [data-testid="stAppViewContainer"], .css-1outpf7, .css-hxt7ib {
@@ -29,7 +29,10 @@ def set_dark_theme():
     }
     </style>
     """
-    st.markdown(dark_css, unsafe_allow_html=True)
+
+def set_dark_theme():
+    # Se emite en cada rerun: Streamlit elimina los elementos que un rerun no vuelve a dibujar
+    st.markdown(DARK_CSS, unsafe_allow_html=True)
 
 def main_header():
     st.markdown(
@@ -1,34 +1,93 @@
 # utils.py
 import pandas as pd
 
+# Columnas de texto que se usan como claves de agrupación en los análisis
+KEY_COLUMNS = ("Rut", "Cargo", "Gerencia", "Causal de Término")
+
+# Columnas de sueldo: se mantienen en 64 bits, sus sumas por período superan la precisión de float32
+SALARY_COLUMNS = ("SueldoBrutoContractual", "SueldoBrutoDiasTrab")
+
 def process_period_column(df: pd.DataFrame) -> pd.DataFrame:
     """
     Convierte la columna 'Periodo', que viene en formato 'aaaamm' (ejemplo: '202201'),
     a un objeto datetime y crea columnas adicionales 'Año' y 'Mes'.
     """
     if "Periodo" in df.columns:
-        # Asegurarse de que el valor sea de tipo string
-        df["Periodo"] = df["Periodo"].astype(str)
-        # Convertir la columna al formato datetime usando el formato '%Y%m'
-        df["Periodo"] = pd.to_datetime(df["Periodo"], format="%Y%m", errors="coerce")
+        # Tratar 'aaaamm' como entero evita formatear y parsear un string por fila
+        periodo = pd.to_numeric(df["Periodo"], errors="coerce")
+        df["Periodo"] = pd.to_datetime(
+            pd.DataFrame({"year": periodo // 100, "month": periodo % 100, "day": 1}),
+            errors="coerce"
+        )
         # Crear nuevas columnas para Año y Mes
         df["Año"] = df["Periodo"].dt.year
         df["Mes"] = df["Periodo"].dt.month
     return df
-# utils.py
-import pandas as pd
 
-def process_period_column(df: pd.DataFrame) -> pd.DataFrame:
+def normalize_text_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Convierte la columna 'Periodo', que viene en formato 'aaaamm' (ejemplo: '202201'),
-    a un objeto datetime y crea columnas adicionales 'Año' y 'Mes'.
+    Crea las columnas normalizadas que usan las métricas clave, como 'category':
+    - 'nombre_norm': "Nombre Completo" sin espacios al inicio ni al final.
+    - 'contrato_norm': "Clasificación Contrato" en minúsculas y sin espacios.
     """
-    if "Periodo" in df.columns:
-        # Asegurarse de que el valor sea de tipo string
-        df["Periodo"] = df["Periodo"].astype(str)
-        # Convertir la columna al formato datetime usando el formato '%Y%m'
-        df["Periodo"] = pd.to_datetime(df["Periodo"], format="%Y%m", errors="coerce")
-        # Crear nuevas columnas para Año y Mes
-        df["Año"] = df["Periodo"].dt.year
-        df["Mes"] = df["Periodo"].dt.month
+    if "Nombre Completo" in df.columns:
+        df["nombre_norm"] = df["Nombre Completo"].astype(str).str.strip().astype("category")
+    if "Clasificación Contrato" in df.columns:
+        df["contrato_norm"] = (
+            df["Clasificación Contrato"].astype(str).str.lower().str.strip().astype("category")
+        )
+    return df
+
+def add_active_flag(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Crea la columna booleana '_activo' (sin fecha de término de contrato), calculada una
+    sola vez en la carga para que los análisis no recorran la columna de fechas en cada rerun.
+    """
+    if "FechaTerminoContrato" in df.columns:
+        df["_activo"] = df["FechaTerminoContrato"].isna().to_numpy()
+    return df
+
+def categorize_key_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte a tipo 'category' las columnas de KEY_COLUMNS presentes en el DataFrame,
+    para que los groupby, nunique e isin de los análisis trabajen sobre códigos enteros
+    en lugar de comparar strings. 'Causal de Término' se limpia de espacios antes,
+    una sola vez, para que los análisis puedan compararla directamente.
+    """
+    if "Causal de Término" in df.columns:
+        df["Causal de Término"] = df["Causal de Término"].astype("string").str.strip()
+    for col in KEY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+def categorize_low_cardinality_columns(df: pd.DataFrame, max_ratio: float = 0.5) -> pd.DataFrame:
+    """
+    Convierte a 'category' las columnas de texto que aún no lo son (las de KEY_COLUMNS
+    y las normalizadas ya lo son) cuya cantidad de valores distintos sea menor que
+    max_ratio veces el número de filas. Con la proyección de la carga, esto cubre sobre
+    todo las columnas originales "Nombre Completo" y "Clasificación Contrato", que se
+    conservan para la vista previa: en un archivo mensual cada nombre se repite una vez
+    por período, así que también quedan como 'category'.
+    """
+    if len(df) == 0:
+        return df
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        unicos = df[col].nunique(dropna=True)
+        if unicos and unicos / len(df) < max_ratio:
+            df[col] = df[col].astype("category")
+    return df
+
+def downcast_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce el tipo de todas las columnas numéricas salvo SALARY_COLUMNS (por ejemplo
+    int64 -> int8 o float64 -> float32) para que los groupby recorran menos memoria.
+    """
+    for col in df.columns:
+        if col in SALARY_COLUMNS:
+            continue
+        if pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="float")
     return df